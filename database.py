@@ -5,7 +5,8 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from redis.asyncio import Redis
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
@@ -17,16 +18,35 @@ load_dotenv()
 
 _client = None
 db = None
+redis_client = None
 
 database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
+redis_url = os.getenv("REDIS_URL")
+
+# Pool limits are per process; each uvicorn worker opens its own client
+mongo_max_pool = int(os.getenv("MONGO_MAX_POOL", 50))
+mongo_min_pool = int(os.getenv("MONGO_MIN_POOL", 5))
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    # Pre-warmed pool sized for many concurrent voters; fail fast instead of queueing forever
+    _client = AsyncIOMotorClient(
+        database_url,
+        maxPoolSize=mongo_max_pool,
+        minPoolSize=mongo_min_pool,
+        waitQueueTimeoutMS=2000,
+        serverSelectionTimeoutMS=2000,
+        compressors="zstd",
+        retryWrites=True,
+    )
     db = _client[database_name]
 
+# Ephemeral OTP / verification state lives in Redis with key expiry
+if redis_url:
+    redis_client = Redis.from_url(redis_url, decode_responses=True)
+
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -40,10 +60,10 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
     """Get documents from collection"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -52,4 +72,4 @@ def get_documents(collection_name: str, filter_dict: dict = None, limit: int = N
     if limit:
         cursor = cursor.limit(limit)
     
-    return list(cursor)
+    return await cursor.to_list(length=None)
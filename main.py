@@ -1,16 +1,23 @@
 import os
 import time
-import base64
 import hashlib
+import hmac
+import secrets
 from typing import List, Optional
 
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ServerSelectionTimeoutError, WaitQueueTimeoutError
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
+import blake3
+import orjson
+import pybase64
 
-from database import db, create_document, get_documents
+from database import db, redis_client, create_document, get_documents
 
-app = FastAPI(title="Voting Simulation API")
+app = FastAPI(title="Voting Simulation API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,78 +29,220 @@ app.add_middleware(
 
 # ---------- Models (request/response) ----------
 
-class SendOtpRequest(BaseModel):
+_BATCH_MAX = 10
+
+class _RequestModel(BaseModel):
+    # Reject unknown fields up front instead of parsing and discarding them
+    model_config = ConfigDict(extra="forbid")
+
+class SendOtpRequest(_RequestModel):
     aadhaar: str
 
-class VerifyOtpRequest(BaseModel):
+class VerifyOtpRequest(_RequestModel):
     aadhaar: str
     otp: str
 
-class VerifyFaceRequest(BaseModel):
+class VerifyFaceRequest(_RequestModel):
     aadhaar: str
     image_base64: str  # "data:image/png;base64,..." or raw base64
 
-class CastVoteRequest(BaseModel):
+class CastVoteRequest(_RequestModel):
     aadhaar: str
     candidate_id: str
 
+class BatchSubRequest(_RequestModel):
+    id: str
+    method: str = "GET"
+    path: str  # e.g. "/auth/verify-otp", may carry a query string
+    body: Optional[dict] = None
+
+class BatchRequest(_RequestModel):
+    # Small cap so one call cannot fan out into e.g. thousands of OTP guesses
+    requests: List[BatchSubRequest] = Field(..., max_length=_BATCH_MAX)
+
 # ---------- Helpers ----------
 
-def _now_ts() -> int:
-    return int(time.time())
+_B64_CHUNK = 87_380  # multiple of 4 base64 chars -> 65_535 decoded bytes
 
+_OTP_TTL = 300  # 5 minutes
+_VERIFICATION_TTL = 900  # verified flags must be used within 15 minutes
 
-def _collection(name: str):
-    if db is None:
-        raise HTTPException(status_code=500, detail="Database not available")
-    return db[name]
+# Process-local cache for the read-mostly public endpoints: name -> (stored_at, value)
+_CACHE_TTL = 2.0
+_cache = {"candidates": (0.0, None), "results": (0.0, None)}
+
+
+def _cache_get(key: str):
+    stored_at, value = _cache[key]
+    if value is not None and time.monotonic() - stored_at < _CACHE_TTL:
+        return value
+    return None
+
+
+def _cache_set(key: str, value):
+    _cache[key] = (time.monotonic(), value)
+
+
+def _cache_clear(key: str):
+    _cache[key] = (0.0, None)
+
+
+# Collection handles resolved once at import; startup refuses to run without a database
+_voters = db["voter"] if db is not None else None
+_candidates = db["candidate"] if db is not None else None
+_votes = db["vote"] if db is not None else None
 
 
-def _sha256_of_base64_image(image_base64: str) -> str:
+async def _mark_verified(aadhaar: str, field: str, ts: int):
+    key = f"ver:{aadhaar}"
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(key, field, ts)
+        pipe.expire(key, _VERIFICATION_TTL)
+        await pipe.execute()
+
+
+async def _dispatch(sub: BatchSubRequest) -> dict:
+    """Run one sub-request through the ASGI app in-process and capture its response"""
+    path, _, query = sub.path.partition("?")
+    raw = orjson.dumps(sub.body) if sub.body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": sub.method.upper(),
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(raw)).encode())],
+        "client": None,
+        "server": None,
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": raw, "more_body": False}
+
+    status_code = 500
+    content_type = b""
+    chunks = []
+
+    async def send(message):
+        nonlocal status_code, content_type
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        return {"id": sub.id, "status": 500, "body": {"detail": "Internal Server Error"}}
+    body = b"".join(chunks)
+    # Non-JSON routes (e.g. /docs) come back as text; a bad body must not drop results already applied
+    parsed = None
+    if body:
+        parsed = body.decode("utf-8", errors="replace")
+        if content_type.startswith(b"application/json"):
+            try:
+                parsed = orjson.loads(body)
+            except ValueError:
+                pass
+    return {"id": sub.id, "status": status_code, "body": parsed}
+
+
+def _blake3_of_base64_image(image_base64: str, with_sha256: bool = False):
+    """Return (blake3_hex, sha256_hex or None); SHA-256 is only needed to check legacy face_hash rows"""
     # strip prefix if present
-    if "," in image_base64:
-        image_base64 = image_base64.split(",", 1)[1]
+    comma = image_base64.find(",")
+    if comma != -1:
+        image_base64 = image_base64[comma + 1:]
+    # decode and hash in ~64 KiB pieces instead of materialising the whole image
+    h = blake3.blake3()
+    legacy = hashlib.sha256() if with_sha256 else None
     try:
-        image_bytes = base64.b64decode(image_base64)
+        for i in range(0, len(image_base64), _B64_CHUNK):
+            chunk = pybase64.b64decode(image_base64[i:i + _B64_CHUNK], validate=True)
+            h.update(chunk)
+            if legacy is not None:
+                legacy.update(chunk)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid base64 image")
-    return hashlib.sha256(image_bytes).hexdigest()
+    return h.hexdigest(), (legacy.hexdigest() if legacy is not None else None)
 
 
-def _ensure_seed_data():
+async def _insert_ignoring_duplicates(coll, docs: list):
+    # ordered=False keeps inserting past duplicate-key rows (e.g. another worker seeded first)
+    try:
+        await coll.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+
+
+async def _ensure_seed_data():
     """Create a few demo candidates and voters if collections are empty"""
-    voters = _collection("voter")
-    candidates = _collection("candidate")
-
-    if candidates.count_documents({}) == 0:
-        candidates.insert_many([
-            {"name": "Alice Johnson", "party": "Unity Party", "created_at": time.time(), "updated_at": time.time()},
-            {"name": "Bob Singh", "party": "Progress Alliance", "created_at": time.time(), "updated_at": time.time()},
-            {"name": "Carla Gomez", "party": "Green Front", "created_at": time.time(), "updated_at": time.time()},
+    # Workers starting together may all see an empty collection; the unique
+    # seed_key / aadhaar indexes make their overlapping inserts a no-op.
+    now = time.time()
+    if await _candidates.find_one({}, {"_id": 1}) is None:
+        await _insert_ignoring_duplicates(_candidates, [
+            {"seed_key": "demo-candidate-1", "name": "Alice Johnson", "party": "Unity Party", "created_at": now, "updated_at": now},
+            {"seed_key": "demo-candidate-2", "name": "Bob Singh", "party": "Progress Alliance", "created_at": now, "updated_at": now},
+            {"seed_key": "demo-candidate-3", "name": "Carla Gomez", "party": "Green Front", "created_at": now, "updated_at": now},
         ])
-
-    if voters.count_documents({}) == 0:
-        voters.insert_many([
-            {"aadhaar": "111122223333", "name": "Ravi Kumar", "phone": "+910000000001", "face_hash": None, "has_voted": False, "created_at": time.time(), "updated_at": time.time()},
-            {"aadhaar": "444455556666", "name": "Anita Sharma", "phone": "+910000000002", "face_hash": None, "has_voted": False, "created_at": time.time(), "updated_at": time.time()},
-            {"aadhaar": "777788889999", "name": "Mohit Patel", "phone": "+910000000003", "face_hash": None, "has_voted": False, "created_at": time.time(), "updated_at": time.time()},
+    if await _voters.find_one({}, {"_id": 1}) is None:
+        await _insert_ignoring_duplicates(_voters, [
+            {"aadhaar": "111122223333", "name": "Ravi Kumar", "phone": "+910000000001", "face_hash_b3": None, "has_voted": False, "created_at": now, "updated_at": now},
+            {"aadhaar": "444455556666", "name": "Anita Sharma", "phone": "+910000000002", "face_hash_b3": None, "has_voted": False, "created_at": now, "updated_at": now},
+            {"aadhaar": "777788889999", "name": "Mohit Patel", "phone": "+910000000003", "face_hash_b3": None, "has_voted": False, "created_at": now, "updated_at": now},
         ])
 
 
+async def _ensure_indexes():
+    """Create indexes backing the per-request lookups"""
+    await _voters.create_index("aadhaar", unique=True)
+    await _votes.create_index("candidate_id")
+    await _votes.create_index("aadhaar", unique=True)  # one ballot per voter, enforced by the database
+    await _candidates.create_index("name")
+    await _candidates.create_index("seed_key", unique=True, partialFilterExpression={"seed_key": {"$exists": True}})
+
+
+async def _migrate_vote_candidate_ids():
+    """Convert votes stored before candidate_id became an ObjectId so /results counts them"""
+    await _votes.update_many(
+        {"candidate_id": {"$type": "string"}},
+        # onError leaves malformed ids as they were instead of aborting startup
+        [{"$set": {"candidate_id": {"$convert": {"input": "$candidate_id", "to": "objectId", "onError": "$candidate_id"}}}}],
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
-    if db is not None:
-        _ensure_seed_data()
+    if db is None:
+        raise RuntimeError("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    if redis_client is None:
+        raise RuntimeError("Redis not available. Check the REDIS_URL environment variable.")
+    await redis_client.ping()
+    await _ensure_indexes()
+    await _migrate_vote_candidate_ids()
+    await _ensure_seed_data()
 
 
 # ---------- Basic ----------
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Voting Simulation API running"}
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -108,7 +257,7 @@ def test_database():
             response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
-            response["collections"] = db.list_collection_names()
+            response["collections"] = await db.list_collection_names()
     except Exception as e:
         response["database"] = f"❌ Error: {str(e)[:80]}"
     return response
@@ -117,32 +266,29 @@ def test_database():
 # ---------- Voting domain ----------
 
 @app.get("/candidates")
-def list_candidates():
-    coll = _collection("candidate")
-    docs = list(coll.find({}, {"name": 1, "party": 1}))
+async def list_candidates():
+    cached = _cache_get("candidates")
+    if cached is not None:
+        return cached
+    docs = await _candidates.find({}, {"name": 1, "party": 1}).to_list(length=None)
     for d in docs:
         d["id"] = str(d.pop("_id"))
-    return {"candidates": docs}
+    out = {"candidates": docs}
+    _cache_set("candidates", out)
+    return out
 
 
 @app.post("/auth/send-otp")
-def send_otp(payload: SendOtpRequest):
-    voter = _collection("voter").find_one({"aadhaar": payload.aadhaar})
+async def send_otp(payload: SendOtpRequest):
+    voter = await _voters.find_one({"aadhaar": payload.aadhaar}, {"_id": 1, "name": 1})
     if not voter:
         raise HTTPException(status_code=404, detail="Voter not found")
 
     # Generate demo OTP
-    otp = str(int(time.time()) % 900000 + 100000)  # pseudo 6-digit
-    expires_at = _now_ts() + 300  # 5 minutes
-
-    _collection("otprequest").insert_one({
-        "aadhaar": payload.aadhaar,
-        "otp": otp,
-        "expires_at": expires_at,
-        "verified": False,
-        "created_at": time.time(),
-        "updated_at": time.time(),
-    })
+    otp = f"{secrets.randbelow(900_000) + 100_000:06d}"
+    expires_at = int(time.time()) + _OTP_TTL
+
+    await redis_client.setex(f"otp:{payload.aadhaar}", _OTP_TTL, otp)
 
     # In real life we'd send SMS. For demo, return the OTP for display
     masked = otp[:2] + "****"
@@ -150,136 +296,166 @@ def send_otp(payload: SendOtpRequest):
 
 
 @app.post("/auth/verify-otp")
-def verify_otp(payload: VerifyOtpRequest):
-    req = _collection("otprequest").find_one({
-        "aadhaar": payload.aadhaar,
-        "otp": payload.otp
-    }, sort=[("created_at", -1)])
-    if not req:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-    if req.get("expires_at", 0) < _now_ts():
-        raise HTTPException(status_code=400, detail="OTP expired")
-
-    _collection("otprequest").update_one({"_id": req["_id"]}, {"$set": {"verified": True, "updated_at": time.time()}})
+async def verify_otp(payload: VerifyOtpRequest):
+    # Redis expires the key, so a missing OTP covers both "never sent" and "expired"
+    otp_key = f"otp:{payload.aadhaar}"
+    stored = await redis_client.get(otp_key)
+    if not stored or not hmac.compare_digest(stored.encode(), payload.otp.encode()):
+        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
+    # Only the request whose DEL removes the key redeems it; a concurrent one loses here
+    if await redis_client.delete(otp_key) != 1:
+        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
     # Mark verification
-    ver = _collection("verification").find_one({"aadhaar": payload.aadhaar})
-    if ver:
-        _collection("verification").update_one({"_id": ver["_id"]}, {"$set": {"otp_verified_at": _now_ts(), "updated_at": time.time()}})
-    else:
-        _collection("verification").insert_one({"aadhaar": payload.aadhaar, "otp_verified_at": _now_ts(), "face_verified_at": None, "created_at": time.time(), "updated_at": time.time()})
+    await _mark_verified(payload.aadhaar, "otp_verified_at", int(time.time()))
 
     return {"message": "OTP verified"}
 
 
 @app.post("/auth/verify-face")
-def verify_face(payload: VerifyFaceRequest):
-    voter = _collection("voter").find_one({"aadhaar": payload.aadhaar})
+async def verify_face(payload: VerifyFaceRequest):
+    voter = await _voters.find_one({"aadhaar": payload.aadhaar}, {"_id": 1, "face_hash": 1, "face_hash_b3": 1})
     if not voter:
         raise HTTPException(status_code=404, detail="Voter not found")
 
-    face_hash = _sha256_of_base64_image(payload.image_base64)
+    stored_hash = voter.get("face_hash_b3")
+    legacy_hash = voter.get("face_hash")  # SHA-256, written before the switch to BLAKE3
+    check_legacy = stored_hash is None and legacy_hash is not None
+    face_hash, sha256_hash = _blake3_of_base64_image(payload.image_base64, with_sha256=check_legacy)
+    now_f = time.time()
 
     # Enroll if first time; verify if already enrolled
-    if voter.get("face_hash") is None:
-        _collection("voter").update_one({"_id": voter["_id"]}, {"$set": {"face_hash": face_hash, "updated_at": time.time()}})
+    if stored_hash is None and legacy_hash is None:
+        await _voters.update_one({"_id": voter["_id"]}, {"$set": {"face_hash_b3": face_hash, "updated_at": now_f}})
         enrolled = True
         verified = True
+    elif check_legacy:
+        enrolled = False
+        verified = (legacy_hash == sha256_hash)
+        if verified:
+            # Migrate the legacy row to BLAKE3 on first successful match
+            await _voters.update_one(
+                {"_id": voter["_id"]},
+                {"$set": {"face_hash_b3": face_hash, "updated_at": now_f}, "$unset": {"face_hash": ""}},
+            )
     else:
         enrolled = False
-        verified = (voter.get("face_hash") == face_hash)
+        verified = (stored_hash == face_hash)
 
     if not verified:
         raise HTTPException(status_code=400, detail="Face does not match. Please try again.")
 
-    ver = _collection("verification").find_one({"aadhaar": payload.aadhaar})
-    if ver:
-        _collection("verification").update_one({"_id": ver["_id"]}, {"$set": {"face_verified_at": _now_ts(), "updated_at": time.time()}})
-    else:
-        _collection("verification").insert_one({"aadhaar": payload.aadhaar, "otp_verified_at": None, "face_verified_at": _now_ts(), "created_at": time.time(), "updated_at": time.time()})
+    await _mark_verified(payload.aadhaar, "face_verified_at", int(now_f))
 
     return {"message": "Face verified", "enrolled": enrolled}
 
 
 @app.get("/status/{aadhaar}")
-def status(aadhaar: str):
-    voter = _collection("voter").find_one({"aadhaar": aadhaar})
+async def status(aadhaar: str):
+    voter = await _voters.find_one({"aadhaar": aadhaar}, {"_id": 1, "name": 1, "has_voted": 1})
     if not voter:
         raise HTTPException(status_code=404, detail="Voter not found")
-    ver = _collection("verification").find_one({"aadhaar": aadhaar})
+    otp_at, face_at = await redis_client.hmget(f"ver:{aadhaar}", "otp_verified_at", "face_verified_at")
     return {
         "aadhaar": aadhaar,
         "name": voter.get("name"),
         "has_voted": bool(voter.get("has_voted", False)),
-        "otp_verified": bool(ver and ver.get("otp_verified_at")),
-        "face_verified": bool(ver and ver.get("face_verified_at")),
+        "otp_verified": bool(otp_at),
+        "face_verified": bool(face_at),
     }
 
 
 @app.post("/vote")
-def cast_vote(payload: CastVoteRequest):
-    voter = _collection("voter").find_one({"aadhaar": payload.aadhaar})
-    if not voter:
-        raise HTTPException(status_code=404, detail="Voter not found")
-    if voter.get("has_voted"):
-        raise HTTPException(status_code=400, detail="Voter has already cast a vote")
-
-    ver = _collection("verification").find_one({"aadhaar": payload.aadhaar})
-    if not ver or not ver.get("otp_verified_at") or not ver.get("face_verified_at"):
+async def cast_vote(payload: CastVoteRequest):
+    otp_at, face_at = await redis_client.hmget(f"ver:{payload.aadhaar}", "otp_verified_at", "face_verified_at")
+    if not otp_at or not face_at:
+        # Only look the voter up on this path, to report 404 / already voted ahead of verification
+        voter = await _voters.find_one({"aadhaar": payload.aadhaar}, {"_id": 1, "has_voted": 1})
+        if not voter:
+            raise HTTPException(status_code=404, detail="Voter not found")
+        if voter.get("has_voted"):
+            raise HTTPException(status_code=400, detail="Voter has already cast a vote")
         raise HTTPException(status_code=400, detail="Complete OTP and Face verification first")
 
     # Ensure candidate exists
-    cand = _collection("candidate").find_one({"_id": {"$eq": _collection("candidate").database.client.get_default_database()["candidate"].with_options().codec_options.document_class}})
-    # We can't query like that; simply check by ObjectId if valid
-    from bson import ObjectId
-    try:
-        cand = _collection("candidate").find_one({"_id": ObjectId(payload.candidate_id)})
-    except Exception:
-        cand = None
+    if not ObjectId.is_valid(payload.candidate_id):
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    candidate_oid = ObjectId(payload.candidate_id)
+    cand = await _candidates.find_one({"_id": candidate_oid}, {"_id": 1})
     if not cand:
         raise HTTPException(status_code=404, detail="Candidate not found")
 
-    # Record vote
-    create_document("vote", {"aadhaar": payload.aadhaar, "candidate_id": payload.candidate_id})
-    _collection("voter").update_one({"_id": voter["_id"]}, {"$set": {"has_voted": True, "updated_at": time.time()}})
+    # Claim the ballot atomically so concurrent requests cannot double-vote
+    voter = await _voters.find_one_and_update(
+        {"aadhaar": payload.aadhaar, "has_voted": False},
+        {"$set": {"has_voted": True, "updated_at": time.time()}},
+        projection={"_id": 1},
+    )
+    if voter is None:
+        # Both flags are only ever set for existing voters, so a missed claim means already voted
+        raise HTTPException(status_code=400, detail="Voter has already cast a vote")
+
+    # Record vote. Release the claim only when the insert certainly never reached the
+    # server; after an ambiguous failure the vote may exist, so the claim must stand.
+    try:
+        await create_document("vote", {"aadhaar": payload.aadhaar, "candidate_id": candidate_oid})
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Voter has already cast a vote")
+    except (WaitQueueTimeoutError, ServerSelectionTimeoutError):
+        await _voters.update_one({"_id": voter["_id"], "has_voted": True}, {"$set": {"has_voted": False, "updated_at": time.time()}})
+        raise HTTPException(status_code=503, detail="Could not record vote, please try again")
+    except Exception:
+        raise HTTPException(status_code=503, detail="Vote status unknown, check /status before retrying")
+    _cache_clear("results")
 
     return {"message": "Vote recorded"}
 
 
+@app.post("/batch")
+async def batch(payload: BatchRequest):
+    # Sub-requests run in order: the voter flow is dependent (verify before vote)
+    out = []
+    for sub in payload.requests:
+        if sub.path.partition("?")[0].rstrip("/") == "/batch":
+            out.append({"id": sub.id, "status": 400, "body": {"detail": "Nested batch requests are not allowed"}})
+            continue
+        out.append(await _dispatch(sub))
+    return {"responses": out}
+
+
 @app.get("/results")
-def results():
-    from bson import ObjectId
-    votes = _collection("vote")
-    cands = _collection("candidate")
+async def results():
+    cached = _cache_get("results")
+    if cached is not None:
+        return cached
 
+    # Join vote counts onto candidates server-side; zero-vote candidates come out with 0
     pipeline = [
-        {"$group": {"_id": "$candidate_id", "count": {"$sum": 1}}}
+        # localField/foreignField + pipeline (MongoDB 5.0+) keeps the join on the
+        # vote.candidate_id index and counts without materialising the vote array
+        {"$lookup": {
+            "from": "vote",
+            "localField": "_id",
+            "foreignField": "candidate_id",
+            "pipeline": [{"$count": "n"}],
+            "as": "v",
+        }},
+        {"$project": {
+            "_id": 0,
+            "candidate_id": {"$toString": "$_id"},
+            "name": 1,
+            "party": 1,
+            "votes": {"$ifNull": [{"$arrayElemAt": ["$v.n", 0]}, 0]},
+        }},
+        {"$sort": {"votes": -1, "name": 1}},
     ]
-    agg = list(votes.aggregate(pipeline))
-
-    # Candidate info map
-    cand_map = {}
-    for c in cands.find({}):
-        cand_map[str(c["_id"])] = {"name": c.get("name"), "party": c.get("party")}
-
-    out = []
-    for a in agg:
-        cand_id = a["_id"]
-        info = cand_map.get(str(cand_id), {"name": "Unknown", "party": None})
-        out.append({"candidate_id": str(cand_id), "name": info.get("name"), "party": info.get("party"), "votes": a.get("count", 0)})
-
-    # Include zero-vote candidates
-    voted_ids = {str(a["_id"]) for a in agg}
-    for cid, info in cand_map.items():
-        if cid not in voted_ids:
-            out.append({"candidate_id": cid, "name": info.get("name"), "party": info.get("party"), "votes": 0})
-
-    # Sort by votes desc
-    out.sort(key=lambda x: x["votes"], reverse=True)
+    out = await _candidates.aggregate(pipeline).to_list(length=None)
+    _cache_set("results", {"results": out})
     return {"results": out}
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 2))
+    uvicorn.run("main:app", host="0.0.0.0", port=port, loop="uvloop", http="httptools", workers=workers)
@@ -11,7 +11,8 @@ Model name is converted to lowercase for the collection name:
 - BlogPost -> "blogs" collection
 """
 
-from pydantic import BaseModel, Field
+from bson import ObjectId
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 
 # Voting system schemas
@@ -24,7 +25,8 @@ class Voter(BaseModel):
     aadhaar: str = Field(..., min_length=8, description="Aadhaar number (simulated)")
     name: str = Field(..., description="Full name")
     phone: str = Field(..., min_length=8, description="Phone number for OTP")
-    face_hash: Optional[str] = Field(None, description="SHA256 hash of face image for verification")
+    face_hash_b3: Optional[str] = Field(None, description="BLAKE3 hash of face image for verification")
+    face_hash: Optional[str] = Field(None, description="Legacy SHA256 face hash, migrated to face_hash_b3 on next match")
     has_voted: bool = Field(False, description="Whether the voter has already cast a vote")
 
 class Candidate(BaseModel):
@@ -40,23 +42,23 @@ class Vote(BaseModel):
     Votes collection schema
     Collection name: "vote"
     """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     aadhaar: str = Field(..., description="Aadhaar of voter who cast the vote")
-    candidate_id: str = Field(..., description="ID of the candidate voted for")
+    candidate_id: ObjectId = Field(..., description="_id of the candidate voted for")
 
 class OtpRequest(BaseModel):
     """
-    OTP requests collection schema
-    Collection name: "otprequest"
+    OTP request shape
+    Stored in Redis as "otp:{aadhaar}" (value: otp, expiry via TTL)
     """
     aadhaar: str = Field(..., description="Voter Aadhaar")
     otp: str = Field(..., description="One-time password (simulated)")
-    expires_at: int = Field(..., description="Unix timestamp for expiry")
-    verified: bool = Field(False, description="Whether OTP was verified")
 
 class Verification(BaseModel):
     """
     Temporary verification flags
-    Collection name: "verification"
+    Stored in Redis as hash "ver:{aadhaar}" with a TTL
     """
     aadhaar: str = Field(...)
     otp_verified_at: Optional[int] = Field(None)